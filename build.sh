@@ -8,4 +8,11 @@ pip install --upgrade pip
 # Install dependencies
 pip install -r requirements.txt
 
+# Optionally swap in Pillow-SIMD (API-compatible, AVX2 resize kernels).
+# It builds from source, so it needs a compiler and libjpeg/zlib headers.
+if [ "${USE_PILLOW_SIMD:-0}" = "1" ]; then
+    pip uninstall -y pillow
+    CC="cc -mavx2" pip install --no-cache-dir pillow-simd
+fi
+
 echo "Build completed successfully!"
\ No newline at end of file
@@ -1,8 +1,8 @@
 """
 Configuration management for AI Recipes Backend
 """
-import os
-from typing import List
+from functools import cached_property, lru_cache
+from typing import FrozenSet, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")  # Render will provide this
     debug: bool = Field(default=False, env="DEBUG")
+    web_concurrency: int = Field(default=1, env="WEB_CONCURRENCY")  # Worker processes when run via main.py
     
     # CORS Configuration
     allowed_origins: str = Field(
@@ -31,30 +32,46 @@ class Settings(BaseSettings):
         env="ALLOWED_FILE_TYPES"
     )
     
+    # Redis Configuration (rate limiting and analysis cache)
+    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
+    redis_timeout_seconds: float = Field(default=0.5, env="REDIS_TIMEOUT_SECONDS")  # Connect and per-command timeout
+    rate_limit_requests: int = 10
+    rate_limit_window_seconds: int = 60
+    analysis_cache_ttl_seconds: int = Field(default=86400, env="ANALYSIS_CACHE_TTL_SECONDS")
+    
     # API Configuration
     gemini_model: str = "gemini-2.0-flash-exp"
     request_timeout: int = 30
     max_retries: int = 3
+    max_worker_threads: int = Field(default=8, env="MAX_WORKER_THREADS")  # Cap for default executor and AnyIO threads
     
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
     
-    @property
+    # Derived values are computed once; settings are immutable after startup
+    @cached_property
     def allowed_origins_list(self) -> List[str]:
         """Convert comma-separated origins to list."""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
     
-    @property
+    @cached_property
     def allowed_file_types_list(self) -> List[str]:
         """Convert comma-separated file types to list."""
         return [file_type.strip() for file_type in self.allowed_file_types.split(",")]
     
-    @property
+    @cached_property
+    def allowed_file_types_set(self) -> FrozenSet[str]:
+        """Allowed file types as a set for O(1) membership checks."""
+        return frozenset(self.allowed_file_types_list)
+    
+    @cached_property
     def max_file_size_bytes(self) -> int:
         """Convert MB to bytes."""
         return self.max_file_size_mb * 1024 * 1024
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the application settings, loading .env only on first call."""
+    return Settings()
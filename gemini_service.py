@@ -2,20 +2,33 @@
 Gemini API service for ingredient analysis and recipe generation
 """
 import json
+import re
 import asyncio
 import logging
-from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
 from io import BytesIO
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 from PIL import Image
-import httpx
 
-from config import settings
-from models import AnalysisResponse, Ingredient, Recipe, SYSTEM_PROMPT, USER_PROMPT
+from config import get_settings
+from models import AnalysisResponse, Ingredient, Recipe, SYSTEM_PROMPT_HASH, SYSTEM_PROMPT_STATIC, USER_PROMPT
 
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Image preprocessing limits for Gemini uploads
+MAX_IMAGE_SIZE = (1024, 1024)
+JPEG_QUALITY = 85
+
+# Decoder for pulling the leading JSON object out of free-form model output
+_JSON_DECODER = json.JSONDecoder()
+
+# Fallback patterns for recovering arrays from malformed JSON responses
+_INGREDIENTS_RE = re.compile(r'"ingredients"\s*:\s*\[(.*?)\]', re.DOTALL)
+_RECIPES_RE = re.compile(r'"recipes"\s*:\s*\[(.*?)\]', re.DOTALL)
+
 
 class GeminiServiceError(Exception):
     """Custom exception for Gemini service errors."""
@@ -30,6 +43,7 @@ class GeminiService:
         genai.configure(api_key=settings.gemini_api_key)
         self.model = genai.GenerativeModel(
             model_name=settings.gemini_model,
+            system_instruction=SYSTEM_PROMPT_STATIC,
             safety_settings={
                 HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
                 HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
@@ -37,7 +51,9 @@ class GeminiService:
                 HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
             }
         )
-        logger.info(f"Initialized Gemini service with model: {settings.gemini_model}")
+        # Bounded pool for CPU-bound image decoding; set in the app lifespan
+        self.image_executor: Optional[ThreadPoolExecutor] = None
+        logger.info(f"Initialized Gemini service with model: {settings.gemini_model} (system prompt {SYSTEM_PROMPT_HASH})")
     
     async def analyze_image(self, image_bytes: bytes) -> AnalysisResponse:
         """
@@ -54,13 +70,11 @@ class GeminiService:
         """
         try:
             # Validate and process image
-            pil_image = await self._process_image(image_bytes)
+            image_part = await self._process_image(image_bytes)
             
-            # Prepare prompt
-            full_prompt = f"{SYSTEM_PROMPT}\n\n{USER_PROMPT}"
-            
-            # Make API call with retry logic
-            response_text = await self._call_gemini_with_retry(pil_image, full_prompt)
+            # Make API call with retry logic; the system prompt is sent
+            # separately as the model's system instruction
+            response_text = await self._call_gemini_with_retry(image_part, USER_PROMPT)
             
             # Parse and validate response
             analysis_response = await self._parse_gemini_response(response_text)
@@ -74,27 +88,42 @@ class GeminiService:
                 raise
             raise GeminiServiceError(f"Unexpected error during image analysis: {str(e)}")
     
-    async def _process_image(self, image_bytes: bytes) -> Image.Image:
-        """Process and validate image bytes."""
+    async def _process_image(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Process and validate image bytes off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.image_executor,
+            self._process_image_sync,
+            image_bytes
+        )
+    
+    def _process_image_sync(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Decode, downscale and re-encode image bytes as a JPEG part for Gemini (runs in a worker thread)."""
         try:
             # Open and validate image
             pil_image = Image.open(BytesIO(image_bytes))
             
+            # Let libjpeg decode at a reduced scale for large JPEGs (no-op for other formats)
+            pil_image.draft('RGB', MAX_IMAGE_SIZE)
+            
             # Convert to RGB if needed
             if pil_image.mode != 'RGB':
                 pil_image = pil_image.convert('RGB')
             
-            # Resize if too large (max 4MB for Gemini)
-            if len(image_bytes) > 4 * 1024 * 1024:
-                pil_image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                logger.info("Resized large image for Gemini API")
+            # Downscale - 1024px is plenty for ingredient detection
+            pil_image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
             
-            return pil_image
+            # Re-encode as a compact JPEG to cut upload size to Gemini
+            output = BytesIO()
+            pil_image.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+            
+            logger.debug(f"Prepared image for Gemini API: {pil_image.size[0]}x{pil_image.size[1]}, {output.tell()} bytes")
+            return {"mime_type": "image/jpeg", "data": output.getvalue()}
             
         except Exception as e:
             raise GeminiServiceError(f"Invalid image format: {str(e)}")
     
-    async def _call_gemini_with_retry(self, image: Image.Image, prompt: str) -> str:
+    async def _call_gemini_with_retry(self, image: Dict[str, Any], prompt: str) -> str:
         """Call Gemini API with retry logic and timeout handling."""
         last_error = None
         
@@ -129,26 +158,23 @@ class GeminiService:
         # All retries failed
         raise last_error or GeminiServiceError("All retry attempts failed")
     
-    async def _generate_content(self, image: Image.Image, prompt: str):
-        """Generate content using Gemini API (async wrapper)."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            lambda: self.model.generate_content([prompt, image])
-        )
+    async def _generate_content(self, image: Dict[str, Any], prompt: str):
+        """Generate content using the Gemini SDK's native async client."""
+        return await self.model.generate_content_async([prompt, image])
     
     async def _parse_gemini_response(self, response_text: str) -> AnalysisResponse:
         """Parse and validate Gemini API response."""
         try:
-            # Clean response text
-            cleaned_text = self._clean_response_text(response_text)
-            
-            # Parse JSON
+            # Decode the first JSON object in a single pass; markdown fences and
+            # any trailing text around it are skipped rather than stripped first
             try:
-                data = json.loads(cleaned_text)
-            except json.JSONDecodeError as e:
+                start_idx = response_text.find('{')
+                if start_idx == -1:
+                    raise ValueError("No JSON object found in response")
+                data, _ = _JSON_DECODER.raw_decode(response_text, start_idx)
+            except ValueError as e:
                 logger.warning(f"JSON parsing failed, attempting to extract JSON: {str(e)}")
-                data = self._extract_json_from_text(cleaned_text)
+                data = self._extract_json_from_text(response_text)
             
             # Validate structure
             if not isinstance(data, dict):
@@ -189,37 +215,13 @@ class GeminiService:
             # Return empty response instead of failing completely
             return AnalysisResponse(ingredients=[], recipes=[])
     
-    def _clean_response_text(self, text: str) -> str:
-        """Clean response text to extract JSON."""
-        # Remove markdown code blocks
-        text = text.replace("```json", "").replace("```", "")
-        
-        # Remove common prefixes/suffixes
-        text = text.strip()
-        
-        # Find JSON-like content
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            return text[start_idx:end_idx + 1]
-        
-        return text
-    
     def _extract_json_from_text(self, text: str) -> Dict[str, Any]:
         """Extract JSON from malformed text response."""
         try:
-            # Try to find JSON-like patterns
-            import re
-            
-            # Look for ingredients pattern
-            ingredients_pattern = r'"ingredients"\s*:\s*\[(.*?)\]'
-            recipes_pattern = r'"recipes"\s*:\s*\[(.*?)\]'
-            
             result = {"ingredients": [], "recipes": []}
             
             # Extract ingredients
-            ing_match = re.search(ingredients_pattern, text, re.DOTALL)
+            ing_match = _INGREDIENTS_RE.search(text)
             if ing_match:
                 try:
                     ingredients_json = f'[{ing_match.group(1)}]'
@@ -228,7 +230,7 @@ class GeminiService:
                     pass
             
             # Extract recipes
-            recipe_match = re.search(recipes_pattern, text, re.DOTALL)
+            recipe_match = _RECIPES_RE.search(text)
             if recipe_match:
                 try:
                     recipes_json = f'[{recipe_match.group(1)}]'
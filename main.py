@@ -1,43 +1,326 @@
 """
 AI Recipes Backend - FastAPI Application
 """
+import asyncio
+import hashlib
 import logging
-import traceback
+import os
+import queue
+import sys
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import Optional
+from io import BytesIO
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import defaultdict, deque
+from typing import DefaultDict, Deque, Dict, Optional, Tuple
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import anyio.to_thread
+from PIL import Image
+import redis.asyncio as redis
 import uvicorn
 
-from config import settings
-from models import AnalysisResponse, ErrorResponse, SuccessResponse
+from config import get_settings
+from models import AnalysisResponse, ErrorResponse, SuccessResponse, SYSTEM_PROMPT_HASH
 from gemini_service import gemini_service, GeminiServiceError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO if not settings.debug else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
+settings = get_settings()
+
+# Configure logging - records are queued in-process and written by a
+# background listener thread so request handlers never block on log I/O.
+# The queue is installed per app run in lifespan, not at import: `python
+# main.py` imports this module twice (as __main__ and as main), and each
+# import would otherwise leave a QueueHandler on an undrained queue.
+log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logging.getLogger().setLevel(logging.INFO if not settings.debug else logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Sliding-window rate limiter backed by a Redis sorted set. Runs atomically
+# on the server so all workers share one view of each client's window.
+RATE_LIMIT_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    return 0
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, window)
+return 1
+"""
+
+# Upload handling
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Allowance for multipart boundaries and headers
+
+# Redis client (None when REDIS_URL is unset) and in-memory fallback state
+redis_client: Optional[redis.Redis] = None
+rate_limit_script = None
+_local_rate_limit: DefaultDict[str, Deque[float]] = defaultdict(
+    lambda: deque(maxlen=settings.rate_limit_requests)
+)
+
+# Analyses currently running, keyed by image digest
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future when the request running it is cancelled."""
+
+
+def start_log_listener() -> Tuple[QueueHandler, QueueListener]:
+    """Route root logging through a queue drained by a background listener."""
+    output_handlers = [
         logging.StreamHandler(),
-        logging.FileHandler("ai-recipes-backend.log")
+        RotatingFileHandler("ai-recipes-backend.log", maxBytes=10 * 1024 * 1024, backupCount=3)
     ]
-)
-logger = logging.getLogger(__name__)
+    for output_handler in output_handlers:
+        output_handler.setFormatter(log_formatter)
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+    # Attached directly rather than via basicConfig, which would give the
+    # QueueHandler its own formatter and format each record twice
+    queue_handler = QueueHandler(log_queue)
+    logging.getLogger().addHandler(queue_handler)
+    return queue_handler, listener
+
+
+def stop_log_listener(queue_handler: QueueHandler, listener: QueueListener) -> None:
+    """Detach the queue from the root logger and flush pending records."""
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+    for output_handler in listener.handlers:
+        output_handler.close()
+
+
+async def is_rate_limited(client_ip: str) -> bool:
+    """Record a request for client_ip and report whether it exceeds the limit."""
+    if redis_client is not None:
+        now_ms = time.time_ns() // 1_000_000
+        try:
+            allowed = await rate_limit_script(
+                keys=[f"rl:{client_ip}"],
+                args=[
+                    now_ms,
+                    settings.rate_limit_window_seconds * 1000,
+                    settings.rate_limit_requests,
+                    f"{now_ms}-{uuid.uuid4().hex}",
+                ],
+            )
+            return not allowed
+        except redis.RedisError as e:
+            # Fail open rather than rejecting traffic when Redis is unreachable
+            logger.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+            return False
+    
+    # In-memory fallback (single process only)
+    current_time = time.time()
+    recent_requests = _local_rate_limit[client_ip]
+    while recent_requests and current_time - recent_requests[0] >= settings.rate_limit_window_seconds:
+        recent_requests.popleft()
+    if len(recent_requests) >= settings.rate_limit_requests:
+        return True
+    recent_requests.append(current_time)
+    return False
+
+
+async def sweep_local_rate_limit() -> None:
+    """Periodically drop in-memory rate limit entries for idle clients."""
+    window = settings.rate_limit_window_seconds
+    while True:
+        await asyncio.sleep(window)
+        cutoff = time.time() - window
+        idle_ips = [ip for ip, requests in _local_rate_limit.items() if not requests or requests[-1] < cutoff]
+        for ip in idle_ips:
+            del _local_rate_limit[ip]
+
+
+def analysis_cache_key(digest: str) -> str:
+    """Cache key for an image, scoped to the model and system prompt that produced it."""
+    return f"cache:img:{settings.gemini_model}:{SYSTEM_PROMPT_HASH}:{digest}"
+
+
+async def get_cached_analysis(digest: str) -> Optional[AnalysisResponse]:
+    """Return a previously cached analysis for an image digest, if any."""
+    if redis_client is None:
+        return None
+    try:
+        cached = await redis_client.get(analysis_cache_key(digest))
+    except redis.RedisError as e:
+        logger.warning(f"Analysis cache unavailable: {str(e)}")
+        return None
+    if cached is None:
+        return None
+    try:
+        return AnalysisResponse.model_validate_json(cached)
+    except ValueError:
+        logger.warning(f"Discarding invalid cached analysis for image {digest[:12]}")
+        return None
+
+
+async def cache_analysis(digest: str, analysis: AnalysisResponse) -> None:
+    """Store an analysis result keyed by image digest."""
+    # Empty results usually mean a failed parse, so don't pin them for a day
+    if redis_client is None or not (analysis.ingredients or analysis.recipes):
+        return
+    try:
+        await redis_client.set(
+            analysis_cache_key(digest),
+            analysis.model_dump_json(),
+            ex=settings.analysis_cache_ttl_seconds
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Failed to cache analysis: {str(e)}")
+
+
+def json_success_response(analysis: AnalysisResponse) -> Response:
+    """Wrap an analysis in SuccessResponse, serialized by pydantic-core."""
+    body = SuccessResponse(
+        success=True,
+        data=analysis,
+        message="Image analyzed successfully"
+    )
+    return Response(content=body.to_json_bytes(), media_type="application/json")
+
+
+async def analyze_deduplicated(digest: str, image_bytes: bytes) -> AnalysisResponse:
+    """Analyze an image, sharing one Gemini call between concurrent identical uploads."""
+    pending = _inflight.get(digest)
+    if pending is not None:
+        logger.info(f"Joining in-flight analysis for image {digest[:12]}")
+        # Shield so a disconnecting follower can't cancel the shared result
+        try:
+            return await asyncio.shield(pending)
+        except _LeaderCancelled:
+            # The leader went away; retry so one follower takes over
+            return await analyze_deduplicated(digest, image_bytes)
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[digest] = future
+    try:
+        result = await gemini_service.analyze_image(image_bytes)
+    except asyncio.CancelledError:
+        future.set_exception(_LeaderCancelled())
+        future.exception()  # Mark retrieved in case no follower is waiting
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(digest, None)
+    
+    future.set_result(result)
+    await cache_analysis(digest, result)
+    return result
+
+
+class UploadTooLargeError(HTTPException):
+    """Raised when an upload exceeds the configured size cap."""
+    
+    def __init__(self):
+        super().__init__(
+            status_code=413,
+            detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
+        )
+
+
+def upload_too_large_response() -> ORJSONResponse:
+    """Build the 413 response shared by the middleware and the upload handler."""
+    return ORJSONResponse(
+        status_code=413,
+        content=ErrorResponse(
+            error=f"File too large. Maximum size: {settings.max_file_size_mb}MB",
+            status_code=413
+        ).model_dump()
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversized uploads while the body is still being received."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        limit = settings.max_file_size_bytes + MULTIPART_OVERHEAD_BYTES
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await upload_too_large_response()(scope, receive, send)
+            return
+        
+        # Chunked bodies carry no Content-Length, so also count bytes as they
+        # arrive and stop the parser as soon as the cap is passed
+        received = 0
+        
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise UploadTooLargeError()
+            return message
+        
+        await self.app(scope, receive_limited, send)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management."""
+    log_queue_handler, log_listener = start_log_listener()
     logger.info("Starting AI Recipes Backend...")
     logger.info(f"Environment: {'Development' if settings.debug else 'Production'}")
     logger.info(f"Allowed origins: {settings.allowed_origins_list}")
     
+    global redis_client, rate_limit_script
+    rate_limit_sweeper = None
+    
     # Startup
     try:
+        if settings.redis_url:
+            # Short timeouts so an unreachable Redis fails open quickly
+            # instead of stalling each request on the OS connect timeout
+            redis_client = redis.from_url(
+                settings.redis_url,
+                socket_connect_timeout=settings.redis_timeout_seconds,
+                socket_timeout=settings.redis_timeout_seconds,
+            )
+            rate_limit_script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+            logger.info("✓ Redis rate limiter and analysis cache configured")
+        else:
+            logger.info("REDIS_URL not set - using in-memory rate limiter")
+            rate_limit_sweeper = asyncio.create_task(sweep_local_rate_limit())
+        
+        # Cap the default executor and AnyIO's thread limiter (used for
+        # UploadFile I/O) so slow requests can't pile up dozens of threads
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=settings.max_worker_threads)
+        )
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.max_worker_threads
+        
+        # Dedicated pool for image decoding so uploads don't starve other thread work
+        image_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            thread_name_prefix="image-decode"
+        )
+        gemini_service.image_executor = image_executor
+        
         # Test Gemini connection
         logger.info("Testing Gemini API connection...")
         # You could add a simple test here if needed
@@ -50,6 +333,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AI Recipes Backend...")
+    if rate_limit_sweeper is not None:
+        rate_limit_sweeper.cancel()
+    gemini_service.image_executor = None
+    image_executor.shutdown(wait=False)
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
+    stop_log_listener(log_queue_handler, log_listener)
 
 
 # Create FastAPI app
@@ -58,14 +349,25 @@ app = FastAPI(
     description="Backend service for AI-powered ingredient analysis and recipe generation",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
 )
 
-# Add CORS middleware
+# Reject oversized uploads early; added before CORS so CORS wraps it and
+# the 413 still carries CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Add CORS middleware - any origin in development (regex compiled once),
+# only the configured origins otherwise
+if settings.debug:
+    cors_origin_options = {"allow_origins": [], "allow_origin_regex": ".*"}
+else:
+    cors_origin_options = {"allow_origins": settings.allowed_origins_list}
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origins_list + ["*"],  # Allow all origins in development
+    **cors_origin_options,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
@@ -73,17 +375,23 @@ app.add_middleware(
 
 
 # Custom exception handlers
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_exception_handler(request: Request, exc: UploadTooLargeError):
+    """Handle uploads over the size cap."""
+    return upload_too_large_response()
+
+
 @app.exception_handler(GeminiServiceError)
 async def gemini_service_exception_handler(request: Request, exc: GeminiServiceError):
     """Handle Gemini service errors."""
     logger.error(f"Gemini service error: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Analysis service temporarily unavailable",
             detail=str(exc) if settings.debug else None,
             status_code=500
-        ).dict()
+        ).model_dump()
     )
 
 
@@ -91,28 +399,28 @@ async def gemini_service_exception_handler(request: Request, exc: GeminiServiceE
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle request validation errors."""
     logger.warning(f"Validation error: {exc.errors()}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content=ErrorResponse(
             error="Invalid request format",
             detail=str(exc.errors()) if settings.debug else None,
             status_code=400
-        ).dict()
+        ).model_dump()
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected errors."""
-    logger.error(f"Unexpected error: {str(exc)}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    return JSONResponse(
+    # Full tracebacks are only formatted when debug logging is on
+    logger.error("Unexpected error: %s", exc, exc_info=exc if logger.isEnabledFor(logging.DEBUG) else None)
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal server error",
             detail=str(exc) if settings.debug else None,
             status_code=500
-        ).dict()
+        ).model_dump()
     )
 
 
@@ -129,27 +437,6 @@ async def analyze_image(
     file: UploadFile = File(..., description="Image file containing food ingredients"),
     request: Request = None
 ):
-    # Basic IP-based rate limiting (production needs Redis/database)
-    client_ip = request.client.host if request else "unknown"
-    
-    # Simple in-memory rate limiting (replace with Redis in production)
-    current_time = time.time()
-    if not hasattr(analyze_image, 'rate_limit'):
-        analyze_image.rate_limit = {}
-    
-    # Allow 10 requests per minute per IP
-    if client_ip in analyze_image.rate_limit:
-        last_requests = analyze_image.rate_limit[client_ip]
-        # Remove requests older than 1 minute
-        recent_requests = [t for t in last_requests if current_time - t < 60]
-        if len(recent_requests) >= 10:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please wait a minute before trying again."
-            )
-        analyze_image.rate_limit[client_ip] = recent_requests + [current_time]
-    else:
-        analyze_image.rate_limit[client_ip] = [current_time]
     """
     Analyze uploaded image to detect ingredients and generate recipe suggestions.
     
@@ -162,6 +449,14 @@ async def analyze_image(
     Raises:
         HTTPException: For various error conditions
     """
+    # IP-based rate limiting (Redis when configured, in-memory otherwise)
+    client_ip = request.client.host if request and request.client else "unknown"
+    if await is_rate_limited(client_ip):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Please wait a minute before trying again."
+        )
+    
     logger.info(f"Received image analysis request: {file.filename}")
     
     # Validate file
@@ -172,28 +467,34 @@ async def analyze_image(
         )
     
     # Check file type
-    if file.content_type not in settings.allowed_file_types_list:
+    if file.content_type not in settings.allowed_file_types_set:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported file type. Allowed types: {', '.join(settings.allowed_file_types_list)}"
         )
     
-    # Read file content
+    # Read file content in chunks, aborting as soon as the size cap is exceeded
+    buffer = bytearray()
+    hasher = hashlib.sha256()
     try:
-        file_content = await file.read()
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer.extend(chunk)
+            hasher.update(chunk)
+            if len(buffer) > settings.max_file_size_bytes:
+                raise UploadTooLargeError()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to read uploaded file: {str(e)}")
         raise HTTPException(
             status_code=400,
             detail="Failed to read uploaded file"
         )
-    
-    # Check file size
-    if len(file_content) > settings.max_file_size_bytes:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
-        )
+    file_content = bytes(buffer)
+    del buffer
     
     if len(file_content) == 0:
         raise HTTPException(
@@ -201,20 +502,23 @@ async def analyze_image(
             detail="Empty file provided"
         )
     
+    # Serve repeat uploads of the same image from cache
+    digest = hasher.hexdigest()
+    cached_result = await get_cached_analysis(digest)
+    if cached_result is not None:
+        logger.info(f"Serving cached analysis for image {digest[:12]}")
+        return json_success_response(cached_result)
+    
     # Analyze image
     try:
-        logger.debug(f"Analyzing image: {len(file_content)} bytes")
-        analysis_result = await gemini_service.analyze_image(file_content)
+        logger.debug("Analyzing image: %d bytes", len(file_content))
+        analysis_result = await analyze_deduplicated(digest, file_content)
         
         # Log results
         logger.info(f"Analysis completed - Ingredients: {len(analysis_result.ingredients)}, Recipes: {len(analysis_result.recipes)}")
         
         # Return success response
-        return SuccessResponse(
-            success=True,
-            data=analysis_result,
-            message="Image analyzed successfully"
-        )
+        return json_success_response(analysis_result)
         
     except GeminiServiceError as e:
         logger.error(f"Gemini service error during analysis: {str(e)}")
@@ -224,17 +528,26 @@ async def analyze_image(
         )
     
     except Exception as e:
-        logger.error(f"Unexpected error during analysis: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Unexpected error during analysis: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(
             status_code=500,
             detail="Internal server error during image analysis"
         )
 
 
+def _make_test_jpeg() -> bytes:
+    """Encode a 1x1 white JPEG for the Gemini connectivity check."""
+    test_image = Image.new('RGB', (1, 1), color='white')
+    img_bytes = BytesIO()
+    test_image.save(img_bytes, format='JPEG')
+    return img_bytes.getvalue()
+
+
 # Development endpoints (only available in debug mode)
 if settings.debug:
     
+    _TEST_IMAGE_BYTES = _make_test_jpeg()
+    
     @app.get("/debug/config")
     async def debug_config():
         """Debug endpoint to check configuration."""
@@ -251,17 +564,8 @@ if settings.debug:
     async def test_gemini():
         """Test endpoint for Gemini API connectivity."""
         try:
-            # Create a simple test image (1x1 white pixel)
-            from PIL import Image
-            from io import BytesIO
-            
-            test_image = Image.new('RGB', (1, 1), color='white')
-            img_bytes = BytesIO()
-            test_image.save(img_bytes, format='JPEG')
-            test_bytes = img_bytes.getvalue()
-            
             # This should return empty results for a white pixel
-            result = await gemini_service.analyze_image(test_bytes)
+            result = await gemini_service.analyze_image(_TEST_IMAGE_BYTES)
             
             return {
                 "status": "success",
@@ -285,6 +589,10 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        # uvloop has no Windows build; fall back to the default asyncio loop there
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=None if settings.debug else settings.web_concurrency,
         log_level="debug" if settings.debug else "info",
         access_log=True
     )
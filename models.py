@@ -1,32 +1,48 @@
 """
 Data models for AI Recipes Backend API
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field
+import hashlib
+import json
+import re
+import textwrap
+from typing import Final, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+
+# Shared model config: immutable (and hashable) instances, unknown fields
+# rejected, and schemas built at import rather than on the first request
+_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid", defer_build=False)
 
 
 class Ingredient(BaseModel):
     """Detected ingredient from image analysis."""
+    model_config = _MODEL_CONFIG
+    
     name: str = Field(..., description="Name of the ingredient")
     category: str = Field(..., description="Category of the ingredient (e.g., 'vegetable', 'protein', 'grain')")
 
 
 class Recipe(BaseModel):
     """Recipe suggestion based on detected ingredients."""
+    model_config = _MODEL_CONFIG
+    
     title: str = Field(..., description="Name of the recipe")
     prep_time: str = Field(..., description="Preparation time (e.g., '30 minutes')")
     difficulty: str = Field(..., description="Difficulty level (e.g., 'easy', 'medium', 'hard')")
-    steps: List[str] = Field(..., description="List of cooking steps")
+    steps: Tuple[str, ...] = Field(..., description="List of cooking steps")
 
 
 class AnalysisResponse(BaseModel):
     """Response model for ingredient analysis and recipe suggestions."""
-    ingredients: List[Ingredient] = Field(default_factory=list, description="Detected ingredients")
-    recipes: List[Recipe] = Field(default_factory=list, description="Recipe suggestions")
+    model_config = _MODEL_CONFIG
+    
+    ingredients: Tuple[Ingredient, ...] = Field(default_factory=tuple, description="Detected ingredients")
+    recipes: Tuple[Recipe, ...] = Field(default_factory=tuple, description="Recipe suggestions")
 
 
 class ErrorResponse(BaseModel):
     """Error response model."""
+    model_config = _MODEL_CONFIG
+    
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
     status_code: int = Field(..., description="HTTP status code")
@@ -34,13 +50,51 @@ class ErrorResponse(BaseModel):
 
 class SuccessResponse(BaseModel):
     """Success response wrapper."""
+    model_config = _MODEL_CONFIG
+    
     success: bool = Field(default=True)
     data: AnalysisResponse = Field(..., description="Analysis results")
     message: Optional[str] = Field(None, description="Success message")
-
+    
+    def to_json_bytes(self) -> bytes:
+        """Serialize straight to JSON bytes via pydantic-core."""
+        return self.__pydantic_serializer__.to_json(self)
+
+
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def _compact_prompt(raw: str) -> str:
+    """Dedent, collapse runs of blank lines and strip a prompt literal."""
+    return _BLANK_LINES_RE.sub("\n\n", textwrap.dedent(raw)).strip()
+
+
+# Example response embedded in the system prompt (sent compact - whitespace is just extra tokens)
+_RESPONSE_EXAMPLE = {
+    "ingredients": [
+        {"name": "ingredient name", "category": "vegetable/protein/grain/etc"}
+    ],
+    "recipes": [
+        {
+            "title": "Creative recipe name",
+            "prep_time": "X minutes",
+            "difficulty": "easy/medium/hard",
+            "steps": [
+                "Step 1: Detailed preparation instructions",
+                "Step 2: Cooking process with temperatures and timing",
+                "Step 3: Professional techniques and tips",
+                "Step 4: Final touches and plating"
+            ]
+        }
+    ]
+}
 
 # Gemini API system prompt - Master Food Analyzer & Recipe Generator
-SYSTEM_PROMPT = """# Master Food Analyzer & Recipe Generator System
+# Keep this block static and pass it as the model's dedicated
+# `system_instruction` rather than concatenating it into the user turn, so the
+# request prefix stays identical across calls and can hit prompt caching.
+# Anything request-specific belongs in a separate message after it.
+_SYSTEM_PROMPT_RAW = """# Master Food Analyzer & Recipe Generator System
 
 You are an advanced AI combining expertise of a nutritionist, food scientist, and Michelin-starred chef.
 
@@ -63,24 +117,7 @@ Generate EXACTLY 3 recipes using ONLY:
 
 ## STRICT OUTPUT FORMAT - JSON ONLY
 Return ONLY valid JSON in this exact structure:
-{
-  "ingredients": [
-    { "name": "ingredient name", "category": "vegetable/protein/grain/etc" }
-  ],
-  "recipes": [
-    {
-      "title": "Creative recipe name",
-      "prep_time": "X minutes",
-      "difficulty": "easy/medium/hard",
-      "steps": [
-        "Step 1: Detailed preparation instructions",
-        "Step 2: Cooking process with temperatures and timing",
-        "Step 3: Professional techniques and tips",
-        "Step 4: Final touches and plating"
-      ]
-    }
-  ]
-}
+{response_example}
 
 ## Recipe Quality Standards
 - Each recipe must have 4-6 detailed steps
@@ -96,8 +133,16 @@ Return ONLY valid JSON in this exact structure:
 4. Use professional culinary terminology
 5. Never add ingredients not visible in the image (except basic household items)"""
 
+# Normalized once at import so every request sends the same, minimal bytes
+SYSTEM_PROMPT_STATIC: Final[str] = _compact_prompt(_SYSTEM_PROMPT_RAW).replace(
+    "{response_example}", json.dumps(_RESPONSE_EXAMPLE, separators=(",", ":"))
+)
+
+# Short fingerprint of the system prompt, usable as a cache key / version tag
+SYSTEM_PROMPT_HASH: Final[str] = hashlib.blake2b(SYSTEM_PROMPT_STATIC.encode("utf-8"), digest_size=8).hexdigest()
+
 # User prompt for Gemini API
-USER_PROMPT = """Analyze this food image as a Master Chef and Nutritionist:
+_USER_PROMPT_RAW = """Analyze this food image as a Master Chef and Nutritionist:
 
 1. IDENTIFY: List all visible food ingredients with their categories
 2. CREATE: Generate EXACTLY 3 professional recipes using ONLY:
@@ -110,3 +155,5 @@ USER_PROMPT = """Analyze this food image as a Master Chef and Nutritionist:
    - Professional chef tips embedded in steps
 
 Return ONLY valid JSON. No explanations outside the JSON structure."""
+
+USER_PROMPT: Final[str] = _compact_prompt(_USER_PROMPT_RAW)
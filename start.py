@@ -2,7 +2,6 @@
 """
 Startup script for AI Recipes Backend
 """
-import os
 import sys
 import subprocess
 from pathlib import Path
@@ -4,147 +4,208 @@ Deployment Validation Script for AI Recipes Backend
 This script checks if the backend is properly configured for Render deployment
 """
 
+import functools
+import importlib.util
+import itertools
 import os
-import sys
-import json
+import py_compile
+import re
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Patterns for the handful of render.yaml fields we validate
+_SERVICES_RE = re.compile(r"^services:", re.M)
+_SERVICE_KEY_RE = re.compile(r"^\s*(?:-\s+)?(type|runtime|name|plan):\s*(\S+)", re.M)
+_ENV_KEY_RE = re.compile(r"^\s*-\s*key:\s*(\S+)", re.M)
+
+_DEVNULL = subprocess.DEVNULL
+
+# Essential Dockerfile instructions, matched in a single pass
+_DOCKERFILE_RE = re.compile(
+    r"^\s*(?:"
+    r"(?P<base>FROM\s+python:3\.11)"
+    r"|(?P<workdir>WORKDIR\s+/app\b)"
+    r"|(?P<copy>COPY\s.*\brequirements\.txt\b)"
+    r"|(?P<pip>RUN\s.*\bpip\s+install\b)"
+    r"|(?P<expose>EXPOSE\s.*\b8000\b)"
+    r"|(?P<cmd>CMD\b)"
+    r")",
+    re.M | re.I,
+)
+_DOCKERFILE_CHECKS = (
+    ("base", "Python 3.11 base image"),
+    ("workdir", "Working directory set"),
+    ("copy", "Requirements copy"),
+    ("pip", "Pip install command"),
+    ("expose", "Port 8000 exposed"),
+    ("cmd", "Start command defined"),
+)
+
+# Packages requirements.txt must declare, in report order
+_ESSENTIAL_PACKAGES = ("fastapi", "uvicorn", "google-generativeai", "python-dotenv", "Pillow", "pydantic")
+_REQUIREMENT_NAME_RE = re.compile(r"[=<>!~;\[\s]")
+
+def _normalize_package(name: str) -> str:
+    """Normalize a distribution name for comparison (PEP 503)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
 
-# Colors for terminal output
-class Colors:
-    GREEN = '\033[92m'
-    RED = '\033[91m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
+_ESSENTIAL_PACKAGE_NAMES = frozenset(_normalize_package(package) for package in _ESSENTIAL_PACKAGES)
 
-def print_header(title: str):
-    """Print a formatted header"""
-    print(f"\n{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.RESET}")
-    print(f"{Colors.BLUE}{Colors.BOLD}{title:^60}{Colors.RESET}")
-    print(f"{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.RESET}")
+# Files the content validators read; without them there is nothing to validate
+_REQUIRED_FILES = frozenset({"Dockerfile", "render.yaml", "requirements.txt", "main.py"})
+
+# Expected first-service settings in render.yaml, in report order
+_EXPECTED_SERVICE = (
+    ("type", "web"),
+    ("runtime", "docker"),
+    ("name", "ai-recipes-backend"),
+    ("plan", "free"),
+)
+
+# Colors for terminal output - disabled when stdout isn't a terminal
+# (CI logs, pipes) or when NO_COLOR is set (https://no-color.org)
+if sys.stdout.isatty() and os.environ.get("NO_COLOR") is None:
+    GREEN, RED, YELLOW, BLUE, RESET, BOLD = '\033[92m', '\033[91m', '\033[93m', '\033[94m', '\033[0m', '\033[1m'
+else:
+    GREEN = RED = YELLOW = BLUE = RESET = BOLD = ""
+
+# Pre-rendered status marks
+OK = f"{GREEN}✓{RESET}"
+FAIL = f"{RED}✗{RESET}"
+WARN = f"{YELLOW}⚠{RESET}"
+
+# Banner rule, rendered once
+_HBAR = f"{BLUE}{BOLD}{'=' * 60}{RESET}"
+
+def print_header(out: List[str], title: str):
+    """Append a formatted header to the output buffer"""
+    out.append(f"\n{_HBAR}\n{BLUE}{BOLD}{title:^60}{RESET}\n{_HBAR}")
+
+@functools.lru_cache(maxsize=None)
+def _read(path: str) -> Optional[str]:
+    """Read a text file at most once per run; None if it can't be read"""
+    try:
+        return Path(path).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
 
-def check_mark(passed: bool) -> str:
-    """Return check or cross mark based on status"""
-    return f"{Colors.GREEN}✓{Colors.RESET}" if passed else f"{Colors.RED}✗{Colors.RESET}"
+def list_present_files() -> FrozenSet[str]:
+    """Names of all entries in the current directory, from a single scandir"""
+    with os.scandir(".") as entries:
+        return frozenset(entry.name for entry in entries)
 
-def check_file_exists(filename: str, required: bool = True) -> Tuple[bool, str]:
+def check_file_exists(filename: str, present: FrozenSet[str], required: bool = True) -> Tuple[bool, str]:
     """Check if a file exists"""
-    exists = Path(filename).exists()
+    exists = filename in present
     if exists:
-        return True, f"{check_mark(True)} {filename} found"
+        return True, f"{OK} {filename} found"
     elif required:
-        return False, f"{check_mark(False)} {filename} NOT FOUND (REQUIRED)"
+        return False, f"{FAIL} {filename} NOT FOUND (REQUIRED)"
     else:
-        return True, f"{Colors.YELLOW}⚠{Colors.RESET} {filename} not found (optional)"
+        return True, f"{WARN} {filename} not found (optional)"
 
-def validate_dockerfile() -> Tuple[bool, List[str]]:
+def validate_dockerfile(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Validate Dockerfile content"""
     messages = []
     passed = True
     
-    if not Path("Dockerfile").exists():
-        return False, [f"{check_mark(False)} Dockerfile not found"]
+    if "Dockerfile" not in present:
+        return False, [f"{FAIL} Dockerfile not found"]
     
-    with open("Dockerfile", "r") as f:
-        content = f.read()
+    content = _read("Dockerfile")
+    if content is None:
+        return False, [f"{FAIL} Dockerfile could not be read"]
     
-    # Check for essential Dockerfile components
-    checks = [
-        ("FROM python:3.11", "Python 3.11 base image"),
-        ("WORKDIR /app", "Working directory set"),
-        ("COPY requirements.txt", "Requirements copy"),
-        ("RUN pip install", "Pip install command"),
-        ("EXPOSE 8000", "Port 8000 exposed"),
-        ("CMD", "Start command defined")
-    ]
+    # One sweep over the file; each match is tagged with the check it satisfies
+    found = {match.lastgroup for match in _DOCKERFILE_RE.finditer(content)}
     
-    for check_str, description in checks:
-        if check_str in content:
-            messages.append(f"  {check_mark(True)} {description}")
+    for check, description in _DOCKERFILE_CHECKS:
+        if check in found:
+            messages.append(f"  {OK} {description}")
         else:
-            messages.append(f"  {check_mark(False)} {description} - MISSING")
+            messages.append(f"  {FAIL} {description} - MISSING")
             passed = False
     
     return passed, messages
 
-def validate_render_yaml() -> Tuple[bool, List[str]]:
+def validate_render_yaml(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Validate render.yaml configuration"""
     messages = []
     passed = True
     
-    if not Path("render.yaml").exists():
-        return False, [f"{check_mark(False)} render.yaml not found"]
+    if "render.yaml" not in present:
+        return False, [f"{FAIL} render.yaml not found"]
     
-    import yaml
-    with open("render.yaml", "r") as f:
-        config = yaml.safe_load(f)
+    text = _read("render.yaml")
+    if text is None:
+        return False, [f"{FAIL} render.yaml could not be read"]
     
     # Check render.yaml structure
-    if "services" not in config:
-        messages.append(f"  {check_mark(False)} Services section missing")
+    if not _SERVICES_RE.search(text):
+        messages.append(f"  {FAIL} Services section missing")
         return False, messages
     
-    service = config["services"][0] if config["services"] else {}
+    # The schema is tiny and fixed, so pull the keys out directly instead of
+    # loading PyYAML; the first occurrence of each key belongs to the first service
+    service = {}
+    for key, value in _SERVICE_KEY_RE.findall(text):
+        service.setdefault(key, value.strip("'\""))
     
-    checks = {
-        "type": "web",
-        "runtime": "docker",
-        "name": "ai-recipes-backend",
-        "plan": "free"
-    }
-    
-    for key, expected in checks.items():
+    for key, expected in _EXPECTED_SERVICE:
         actual = service.get(key)
         if actual == expected:
-            messages.append(f"  {check_mark(True)} {key}: {actual}")
+            messages.append(f"  {OK} {key}: {actual}")
         else:
-            messages.append(f"  {check_mark(False)} {key}: {actual} (expected: {expected})")
+            messages.append(f"  {FAIL} {key}: {actual} (expected: {expected})")
             passed = False if key in ["type", "runtime"] else passed
     
     # Check environment variables
-    env_vars = service.get("envVars", [])
-    env_keys = [var.get("key") for var in env_vars if isinstance(var, dict)]
+    # Only the first few keys are reported, so don't collect the rest
+    env_keys = [match.group(1) for match in itertools.islice(_ENV_KEY_RE.finditer(text), 3)]
     
-    if env_vars:
-        messages.append(f"  {check_mark(True)} Environment variables configured: {', '.join(env_keys[:3])}...")
+    if env_keys:
+        messages.append(f"  {OK} Environment variables configured: {', '.join(env_keys)}...")
     else:
-        messages.append(f"  {Colors.YELLOW}⚠{Colors.RESET} No environment variables in render.yaml (will need to add in dashboard)")
+        messages.append(f"  {WARN} No environment variables in render.yaml (will need to add in dashboard)")
     
     return passed, messages
 
-def validate_requirements() -> Tuple[bool, List[str]]:
+def validate_requirements(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Validate requirements.txt"""
     messages = []
     passed = True
     
-    if not Path("requirements.txt").exists():
-        return False, [f"{check_mark(False)} requirements.txt not found"]
+    if "requirements.txt" not in present:
+        return False, [f"{FAIL} requirements.txt not found"]
     
-    with open("requirements.txt", "r") as f:
-        requirements = f.read()
+    requirements = _read("requirements.txt")
+    if requirements is None:
+        return False, [f"{FAIL} requirements.txt could not be read"]
     
-    essential_packages = [
-        "fastapi",
-        "uvicorn",
-        "google-generativeai",
-        "python-dotenv",
-        "Pillow",
-        "pydantic"
-    ]
+    # Parse package names once: drop comments, version specifiers, extras and
+    # environment markers, and normalize case/separators (so `pillow` matches
+    # `Pillow` and `pydantic-core` doesn't count as `pydantic`)
+    packages = set()
+    for line in requirements.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        packages.add(_normalize_package(_REQUIREMENT_NAME_RE.split(line, 1)[0]))
     
-    for package in essential_packages:
-        if package in requirements:
-            messages.append(f"  {check_mark(True)} {package} included")
-        else:
-            messages.append(f"  {check_mark(False)} {package} NOT FOUND")
+    missing = _ESSENTIAL_PACKAGE_NAMES.difference(packages)
+    for package in _ESSENTIAL_PACKAGES:
+        if _normalize_package(package) in missing:
+            messages.append(f"  {FAIL} {package} NOT FOUND")
             passed = False
+        else:
+            messages.append(f"  {OK} {package} included")
     
     return passed, messages
 
-def validate_python_files() -> Tuple[bool, List[str]]:
+def validate_python_files(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Validate Python application files"""
     messages = []
     passed = True
@@ -159,61 +220,82 @@ def validate_python_files() -> Tuple[bool, List[str]]:
     ]
     
     for filename, required in files_to_check:
-        exists = Path(filename).exists()
-        if exists:
-            messages.append(f"  {check_mark(True)} {filename}")
+        if filename in present:
+            messages.append(f"  {OK} {filename}")
         elif required:
-            messages.append(f"  {check_mark(False)} {filename} NOT FOUND")
+            messages.append(f"  {FAIL} {filename} NOT FOUND")
             passed = False
         else:
-            messages.append(f"  {Colors.YELLOW}⚠{Colors.RESET} {filename} not found (create from .env.example)")
+            messages.append(f"  {WARN} {filename} not found (create from .env.example)")
     
     return passed, messages
 
+def _git(*args: str) -> Tuple[int, str]:
+    """Run a git command, returning its exit code and stdout (stderr discarded)"""
+    result = subprocess.run(["git", *args], stdout=subprocess.PIPE, stderr=_DEVNULL, check=False)
+    return result.returncode, result.stdout.decode("ascii", "replace")
+
 def check_git_status() -> Tuple[bool, List[str]]:
     """Check Git repository status"""
     messages = []
     passed = True
     
     try:
-        # Check if it's a git repository
-        result = subprocess.run(["git", "rev-parse", "--git-dir"], 
-                              capture_output=True, text=True)
-        if result.returncode != 0:
-            return False, [f"{check_mark(False)} Not a Git repository"]
-        
-        # Check remote
-        result = subprocess.run(["git", "remote", "get-url", "origin"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            remote_url = result.stdout.strip()
-            messages.append(f"  {check_mark(True)} Remote: {remote_url}")
-        else:
-            messages.append(f"  {check_mark(False)} No Git remote configured")
-            passed = False
-        
-        # Check for uncommitted changes
-        result = subprocess.run(["git", "status", "--porcelain"], 
-                              capture_output=True, text=True)
-        if result.stdout.strip():
-            messages.append(f"  {Colors.YELLOW}⚠{Colors.RESET} Uncommitted changes detected")
-            messages.append(f"    Run: git add -A && git commit -m 'message' && git push")
-        else:
-            messages.append(f"  {check_mark(True)} All changes committed")
-        
-        # Check current branch
-        result = subprocess.run(["git", "branch", "--show-current"], 
-                              capture_output=True, text=True)
-        branch = result.stdout.strip()
-        messages.append(f"  {check_mark(True)} Current branch: {branch}")
+        # Branch, upstream and dirty state (untracked files included) in one call;
+        # non-zero means not a repo
+        status_code, status_out = _git("status", "--porcelain=v2", "--branch")
+        if status_code != 0:
+            return False, [f"{FAIL} Not a Git repository"]
         
+        remote_code, remote_out = _git("remote", "get-url", "origin")
     except Exception as e:
-        messages.append(f"  {check_mark(False)} Git error: {str(e)}")
+        return False, [f"  {FAIL} Git error: {str(e)}"]
+    
+    branch = ""
+    upstream = None
+    dirty = False
+    for line in status_out.splitlines():
+        if line.startswith("# branch.head "):
+            branch = line[len("# branch.head "):]
+        elif line.startswith("# branch.upstream "):
+            upstream = line[len("# branch.upstream "):]
+        elif line and not line.startswith("#"):
+            dirty = True
+    
+    # Check remote
+    if remote_code == 0:
+        remote_url = remote_out.strip()
+        messages.append(f"  {OK} Remote: {remote_url}")
+    else:
+        messages.append(f"  {FAIL} No Git remote configured")
         passed = False
     
+    # Check for uncommitted changes
+    if dirty:
+        messages.append(f"  {WARN} Uncommitted changes detected")
+        messages.append(f"    Run: git add -A && git commit -m 'message' && git push")
+    else:
+        messages.append(f"  {OK} All changes committed")
+    
+    # Check current branch
+    messages.append(f"  {OK} Current branch: {branch}")
+    if upstream:
+        messages.append(f"  {OK} Tracking: {upstream}")
+    
     return passed, messages
 
-def test_python_syntax() -> Tuple[bool, List[str]]:
+def _compile_in_memory(filename: str) -> Optional[str]:
+    """Compile a source file without writing bytecode; returns the problem, if any"""
+    source = _read(filename)
+    if source is None:
+        return "could not be read"
+    try:
+        compile(source, filename, "exec")
+    except (SyntaxError, ValueError) as e:
+        return f"has syntax error: {e}"
+    return None
+
+def test_python_syntax(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Test Python files for syntax errors"""
     messages = []
     passed = True
@@ -221,51 +303,119 @@ def test_python_syntax() -> Tuple[bool, List[str]]:
     python_files = ["main.py", "config.py", "models.py", "gemini_service.py"]
     
     for filename in python_files:
-        if not Path(filename).exists():
+        if filename not in present:
             continue
         
+        # A bytecode cache newer than the source means it already compiled cleanly
+        cached = Path(importlib.util.cache_from_source(filename))
+        try:
+            if cached.exists() and cached.stat().st_mtime >= Path(filename).stat().st_mtime:
+                messages.append(f"  {OK} {filename} syntax OK")
+                continue
+        except OSError:
+            pass
+        
         try:
-            with open(filename, "r") as f:
-                code = f.read()
-            compile(code, filename, "exec")
-            messages.append(f"  {check_mark(True)} {filename} syntax OK")
-        except SyntaxError as e:
-            messages.append(f"  {check_mark(False)} {filename} has syntax error: {e}")
+            py_compile.compile(filename, doraise=True)
+            error = None
+        except py_compile.PyCompileError as e:
+            error = f"has syntax error: {e.exc_value}"
+        except OSError:
+            # The .pyc couldn't be written (read-only checkout, bad
+            # __pycache__); that says nothing about the source itself
+            error = _compile_in_memory(filename)
+        
+        if error is None:
+            messages.append(f"  {OK} {filename} syntax OK")
+        else:
+            messages.append(f"  {FAIL} {filename} {error}")
             passed = False
     
     return passed, messages
 
-def check_environment_variables() -> Tuple[bool, List[str]]:
+def _parse_env(text: str) -> Dict[str, str]:
+    """Parse KEY=value lines from a .env file, skipping comments"""
+    env = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip()
+        if key.startswith("export "):
+            key = key[len("export "):].strip()
+        value = value.strip()
+        if value[:1] in ("'", '"') and value[:1] in value[1:]:
+            value = value[1:value.index(value[0], 1)]
+        else:
+            value = value.split(" #", 1)[0].strip()
+        env[key] = value
+    return env
+
+def check_environment_variables(present: FrozenSet[str]) -> Tuple[bool, List[str]]:
     """Check if required environment variables are configured"""
     messages = []
     passed = True
     
     # Check .env file
-    env_file = Path(".env")
-    if env_file.exists():
-        messages.append(f"  {check_mark(True)} .env file exists")
+    if ".env" in present:
+        messages.append(f"  {OK} .env file exists")
         
-        with open(".env", "r") as f:
-            env_content = f.read()
+        env = _parse_env(_read(".env") or "")
         
-        if "GEMINI_API_KEY" in env_content and "your_gemini_api_key_here" not in env_content:
-            messages.append(f"  {check_mark(True)} GEMINI_API_KEY appears configured")
+        if env.get("GEMINI_API_KEY") not in (None, "", "your_gemini_api_key_here"):
+            messages.append(f"  {OK} GEMINI_API_KEY appears configured")
         else:
-            messages.append(f"  {Colors.YELLOW}⚠{Colors.RESET} GEMINI_API_KEY needs to be set in Render dashboard")
+            messages.append(f"  {WARN} GEMINI_API_KEY needs to be set in Render dashboard")
     else:
-        messages.append(f"  {Colors.YELLOW}⚠{Colors.RESET} .env file not found (OK for production)")
+        messages.append(f"  {WARN} .env file not found (OK for production)")
         messages.append(f"    Remember to set environment variables in Render dashboard")
     
     return passed, messages
 
+def run_content_checks(out: List[str], present: FrozenSet[str]) -> bool:
+    """Run validation sections 2-8, appending their output; returns overall pass"""
+    # (title, validator, whether a failure fails the run)
+    sections = [
+        ("2. Dockerfile Validation", lambda: validate_dockerfile(present), True),
+        ("3. Render.yaml Validation", lambda: validate_render_yaml(present), True),
+        ("4. Requirements Validation", lambda: validate_requirements(present), True),
+        ("5. Python Files Check", lambda: validate_python_files(present), True),
+        ("6. Python Syntax Check", lambda: test_python_syntax(present), True),
+        ("7. Git Repository Status", check_git_status, False),
+        ("8. Environment Variables", lambda: check_environment_variables(present), False),
+    ]
+    
+    # The validators only read files and spawn git, so overlap their I/O and
+    # report results in section order
+    all_passed = True
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [(title, executor.submit(validator), required) for title, validator, required in sections]
+        for title, future, required in futures:
+            out.append(f"\n{BOLD}{title}{RESET}")
+            try:
+                passed, messages = future.result()
+            except Exception as e:
+                # Report a crashed validator as a failed section rather than
+                # losing the buffered output
+                passed, messages = False, [f"{FAIL} Check raised {type(e).__name__}: {e}"]
+            out.extend(messages)
+            if required and not passed:
+                all_passed = False
+    
+    return all_passed
+
 def main():
     """Run all validation checks"""
-    print_header("AI RECIPES BACKEND - DEPLOYMENT VALIDATION")
+    # Output is buffered and written once at the end
+    out: List[str] = []
+    print_header(out, "AI RECIPES BACKEND - DEPLOYMENT VALIDATION")
     
     all_passed = True
+    present = list_present_files()
     
     # 1. Check essential files
-    print(f"\n{Colors.BOLD}1. Essential Files Check{Colors.RESET}")
+    out.append(f"\n{BOLD}1. Essential Files Check{RESET}")
     checks = [
         ("Dockerfile", True),
         ("render.yaml", True),
@@ -276,85 +426,41 @@ def main():
     ]
     
     for filename, required in checks:
-        passed, message = check_file_exists(filename, required)
-        print(f"   {message}")
+        passed, message = check_file_exists(filename, present, required)
+        out.append(f"   {message}")
         if not passed and required:
             all_passed = False
     
-    # 2. Validate Dockerfile
-    print(f"\n{Colors.BOLD}2. Dockerfile Validation{Colors.RESET}")
-    passed, messages = validate_dockerfile()
-    for msg in messages:
-        print(msg)
-    if not passed:
+    # Content checks only make sense once the files they read exist
+    missing_required = _REQUIRED_FILES - present
+    if missing_required:
+        out.append(f"\n   {FAIL} Missing required files: {', '.join(sorted(missing_required))}")
+        out.append("   Skipping content validation until they are added.")
         all_passed = False
-    
-    # 3. Validate render.yaml
-    print(f"\n{Colors.BOLD}3. Render.yaml Validation{Colors.RESET}")
-    try:
-        import yaml
-        passed, messages = validate_render_yaml()
-        for msg in messages:
-            print(msg)
-        if not passed:
-            all_passed = False
-    except ImportError:
-        print(f"  {Colors.YELLOW}⚠{Colors.RESET} PyYAML not installed, skipping YAML validation")
-    
-    # 4. Validate requirements.txt
-    print(f"\n{Colors.BOLD}4. Requirements Validation{Colors.RESET}")
-    passed, messages = validate_requirements()
-    for msg in messages:
-        print(msg)
-    if not passed:
+    elif not run_content_checks(out, present):
         all_passed = False
     
-    # 5. Validate Python files
-    print(f"\n{Colors.BOLD}5. Python Files Check{Colors.RESET}")
-    passed, messages = validate_python_files()
-    for msg in messages:
-        print(msg)
-    if not passed:
-        all_passed = False
-    
-    # 6. Test Python syntax
-    print(f"\n{Colors.BOLD}6. Python Syntax Check{Colors.RESET}")
-    passed, messages = test_python_syntax()
-    for msg in messages:
-        print(msg)
-    if not passed:
-        all_passed = False
-    
-    # 7. Git status
-    print(f"\n{Colors.BOLD}7. Git Repository Status{Colors.RESET}")
-    passed, messages = check_git_status()
-    for msg in messages:
-        print(msg)
-    
-    # 8. Environment variables
-    print(f"\n{Colors.BOLD}8. Environment Variables{Colors.RESET}")
-    passed, messages = check_environment_variables()
-    for msg in messages:
-        print(msg)
-    
     # Summary
-    print_header("VALIDATION SUMMARY")
+    print_header(out, "VALIDATION SUMMARY")
     
     if all_passed:
-        print(f"\n{Colors.GREEN}{Colors.BOLD}✓ ALL CHECKS PASSED!{Colors.RESET}")
-        print(f"\nYour backend is ready for deployment to Render!")
-        print(f"\n{Colors.BOLD}Next Steps:{Colors.RESET}")
-        print("1. Go to https://dashboard.render.com/blueprints")
-        print("2. Click 'New Blueprint Instance'")
-        print("3. Select repository: nikhil0100kumar/ai-recipes-backend")
-        print("4. Add GEMINI_API_KEY in environment variables")
-        print("5. Click 'Apply' to deploy")
+        out.append(f"\n{GREEN}{BOLD}✓ ALL CHECKS PASSED!{RESET}")
+        out.append(f"\nYour backend is ready for deployment to Render!")
+        out.append(f"\n{BOLD}Next Steps:{RESET}")
+        out.append("1. Go to https://dashboard.render.com/blueprints")
+        out.append("2. Click 'New Blueprint Instance'")
+        out.append("3. Select repository: nikhil0100kumar/ai-recipes-backend")
+        out.append("4. Add GEMINI_API_KEY in environment variables")
+        out.append("5. Click 'Apply' to deploy")
     else:
-        print(f"\n{Colors.RED}{Colors.BOLD}✗ SOME CHECKS FAILED{Colors.RESET}")
-        print(f"\nPlease fix the issues above before deploying.")
+        out.append(f"\n{RED}{BOLD}✗ SOME CHECKS FAILED{RESET}")
+        out.append(f"\nPlease fix the issues above before deploying.")
+    
+    out.append(f"\n{BLUE}Repository: https://github.com/nikhil0100kumar/ai-recipes-backend{RESET}")
+    out.append(f"{BLUE}After deployment: https://ai-recipes-backend.onrender.com{RESET}\n")
     
-    print(f"\n{Colors.BLUE}Repository: https://github.com/nikhil0100kumar/ai-recipes-backend{Colors.RESET}")
-    print(f"{Colors.BLUE}After deployment: https://ai-recipes-backend.onrender.com{Colors.RESET}\n")
+    sys.stdout.write("\n".join(out) + "\n")
+    return 0 if all_passed else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file